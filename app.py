@@ -1,14 +1,46 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sqlite3
 import plotly.express as px
 import plotly.graph_objects as go
 import os
+from pathlib import Path
 from datetime import datetime
 
+try:
+    import connectorx as cx
+except ImportError:  # 선택 의존성: 없으면 sqlite3 + pandas로 로드
+    cx = None
+
+try:
+    from numba import njit, prange
+except ImportError:  # 선택 의존성: 없으면 NumPy 벡터 연산만 사용
+    njit = None
+
+try:
+    import datashader as ds
+    import datashader.transfer_functions as tf
+except ImportError:  # 선택 의존성: 대용량 산점도 래스터화에만 사용
+    ds = None
+
 # --- CONFIGURATION ---
 st.set_page_config(page_title="Nemostore Professional EDA Dashboard", layout="wide")
 
+DB_PATH_CANDIDATES = ["data/nemo_store.db", "data/nemostore.db"]  # 앞쪽 경로 우선
+AMOUNT_UNIT = 1000  # JSON/DB 금액 단위 (1,000원)
+DETAIL_PAGE_SIZE = 20  # 상세 정보 페이지당 매물 수
+HISTOGRAM_BINS = 50
+SCATTER_RASTER_THRESHOLD = 50_000  # 이 행 수를 넘으면 산점도를 래스터 이미지로 렌더링
+SCATTER_RASTER_SIZE = (800, 600)
+NUMBA_MIN_ROWS = 200_000  # 이보다 작은 데이터는 JIT 컴파일 비용이 더 커서 NumPy 사용
+CATEGORY_COLS = ['businessLargeCodeName', 'businessMiddleCodeName', 'nearSubwayStation']
+CSV_DTYPES = {
+    'businessLargeCodeName': 'category', 'businessMiddleCodeName': 'category', 'nearSubwayStation': 'category',
+}
+
+EMPTY_FILTER_MESSAGE = "필터 조건에 맞는 매물이 없습니다."
+
 # --- UTILS ---
 def format_krw(amount):
     """금액을 읽기 쉬운 원 단위 콤마 형식으로 포맷팅"""
@@ -16,98 +48,286 @@ def format_krw(amount):
         return "N/A"
     return f"{int(amount):,}원"
 
-def calculate_interest_score(row):
-    """관심도(Interest Score) 계산: viewCount + (favoriteCount * 3)"""
-    return row.get('viewCount', 0) + (row.get('favoriteCount', 0) * 3)
+def downcast_dtypes(df):
+    """메모리 절감을 위한 dtype 축소: 정수만 downcast (실수는 정밀도 유지를 위해 float64), 코드명 컬럼은 category"""
+    for col in df.select_dtypes('integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    cat_cols = [col for col in CATEGORY_COLS if col in df.columns]
+    df[cat_cols] = df[cat_cols].astype('category')
+    return df
+
+def _compute_derived_numpy(view, fav, rent, size):
+    """관심도 점수와 평당 월세 계산 (NumPy 벡터 연산)"""
+    interest = view + fav * 3
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rent_per_area = np.where(size > 0, rent / size, 0.0)
+    return interest, rent_per_area
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _compute_derived_numba(view, fav, rent, size):
+        """관심도 점수와 평당 월세 계산 (Numba 병렬 커널)"""
+        n = view.shape[0]
+        interest = np.empty(n, dtype=np.int64)
+        rent_per_area = np.empty(n, dtype=np.float64)
+        for i in prange(n):
+            interest[i] = view[i] + fav[i] * 3
+            rent_per_area[i] = rent[i] / size[i] if size[i] > 0 else 0.0
+        return interest, rent_per_area
+
+def compute_derived(view, fav, rent, size):
+    """파생 변수 계산: 대용량 데이터이고 Numba가 있으면 JIT 커널, 아니면 NumPy"""
+    if njit is not None and len(view) >= NUMBA_MIN_ROWS:
+        return _compute_derived_numba(view, fav, rent, size)
+    return _compute_derived_numpy(view, fav, rent, size)
+
+def restore_widget_state(key, default, clamp=None):
+    """섹션 전환으로 사라졌던 위젯 값을 복원하고 위젯 키('_' + key) 반환"""
+    # 렌더링되지 않은 위젯의 상태는 Streamlit이 삭제하므로, 값은 위젯이 아닌 key에 따로 보관
+    widget_key = f"_{key}"
+    if widget_key not in st.session_state:
+        st.session_state[widget_key] = st.session_state.get(key, default)
+    if clamp is not None:
+        st.session_state[widget_key] = clamp(st.session_state[widget_key])
+    return widget_key
+
+def save_widget_state(key, value):
+    """위젯 값을 섹션 전환 후에도 유지되는 session_state key에 저장"""
+    st.session_state[key] = value
+    return value
 
 # --- DATA LOADING ---
+def resolve_db_path():
+    """존재하는 첫 번째 DB 경로 반환 (없으면 None)"""
+    return next((path for path in DB_PATH_CANDIDATES if os.path.exists(path)), None)
+
 def load_data(source_type="DB", uploaded_file=None):
     """데이터 소스(DB 또는 CSV)로부터 데이터 로드"""
     if source_type == "CSV" and uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
-            return df
+            # 헤더만 먼저 읽어 존재하는 컬럼에만 dtype/날짜 파싱 지정
+            columns = pd.read_csv(uploaded_file, nrows=0).columns
+            uploaded_file.seek(0)
+            dtypes = {col: dtype for col, dtype in CSV_DTYPES.items() if col in columns}
+            parse_dates = [col for col in ['createdDateUtc'] if col in columns]
+            
+            # 코드명 컬럼은 파싱 단계에서 바로 category로 읽어 object 문자열 배열 생성을 피함
+            df = pd.read_csv(uploaded_file, dtype=dtypes, parse_dates=parse_dates)
+            return downcast_dtypes(df)
         except Exception as e:
             st.error(f"CSV 로드 중 오류 발생: {e}")
             return pd.DataFrame()
     else:
-        # nemo_store.db를 우선적으로 확인
-        db_path = "data/nemo_store.db"
-        if not os.path.exists(db_path):
-            db_path = "data/nemostore.db"
-        
-        if not os.path.exists(db_path):
+        db_path = resolve_db_path()
+        if db_path is None:
             return pd.DataFrame()
 
         try:
-            conn = sqlite3.connect(db_path)
-            df = pd.read_sql_query("SELECT * FROM stores", conn)
-            conn.close()
-            return df
+            return load_db_data(db_path, os.path.getmtime(db_path))
         except Exception as e:
             st.error(f"DB 로드 중 오류 발생: {e}")
             return pd.DataFrame()
 
+@st.cache_data(show_spinner=False)
+def load_db_data(db_path, db_mtime):
+    """SQLite DB의 stores 테이블 로드 (db_mtime은 DB 변경 시 캐시 무효화용)"""
+    if cx is not None:
+        # connectorx는 자체 연결을 열기 때문에 get_connection의 공유 연결/mmap 설정을 쓰지 않음
+        # (결과가 db_mtime 기준으로 캐시되므로 DB 버전당 한 번만 연결)
+        try:
+            return downcast_dtypes(cx.read_sql(f"sqlite://{os.path.abspath(db_path)}", "SELECT * FROM stores"))
+        except Exception:
+            # SQLite의 느슨한 컬럼 타입 등으로 connectorx 타입 추론이 실패하면 sqlite3로 재시도
+            pass
+    cursor = get_connection(db_path, db_mtime).execute("SELECT * FROM stores")
+    df = pd.DataFrame(cursor.fetchall(), columns=[desc[0] for desc in cursor.description])
+    return downcast_dtypes(df)
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_connection(db_path, db_mtime):
+    """읽기 전용 SQLite 연결을 한 번만 열어 rerun/세션 간 재사용 (DB 파일 교체 시 db_mtime으로 재연결)"""
+    conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    conn.executescript("PRAGMA mmap_size=268435456; PRAGMA cache_size=-64000;")
+    return conn
+
+def _sql_median(conn, col):
+    """SQLite에서 컬럼 중앙값 계산 (짝수 개일 때 가운데 두 값의 평균)"""
+    return conn.execute(f"""
+        SELECT AVG({col}) FROM (
+            SELECT {col} FROM stores WHERE {col} IS NOT NULL ORDER BY {col}
+            LIMIT 2 - (SELECT COUNT({col}) FROM stores) % 2
+            OFFSET (SELECT (COUNT({col}) - 1) / 2 FROM stores)
+        )
+    """).fetchone()[0]
+
+@st.cache_data(show_spinner=False)
+def sql_overview_stats(db_path, db_mtime):
+    """개요 섹션 KPI를 SQLite 집계 쿼리로 계산 (db_mtime은 DB 변경 시 캐시 무효화용)"""
+    conn = get_connection(db_path, db_mtime)
+    count, mean_size, mean_premium = conn.execute(
+        "SELECT COUNT(*), AVG(size), AVG(premium) FROM stores"
+    ).fetchone()
+    type_rows = conn.execute("""
+        SELECT businessLargeCodeName, COUNT(*) AS cnt FROM stores
+        WHERE businessLargeCodeName IS NOT NULL
+        GROUP BY businessLargeCodeName ORDER BY cnt DESC, businessLargeCodeName
+    """).fetchall()
+    median_deposit = _sql_median(conn, 'deposit')
+    median_rent = _sql_median(conn, 'monthlyRent')
+    
+    type_counts = pd.Series(dict(type_rows), name='count')
+    type_counts.index.name = 'businessLargeCodeName'
+    def to_krw(value):
+        return value * AMOUNT_UNIT if value is not None else np.nan
+    return {
+        'count': count,
+        'median_deposit': to_krw(median_deposit),
+        'median_rent': to_krw(median_rent),
+        'mean_size': mean_size if mean_size is not None else np.nan,
+        'mean_premium': to_krw(mean_premium),
+        'type_counts': type_counts,
+        'top_type': type_counts.index[0] if not type_counts.empty else "N/A",
+    }
+
+@st.cache_data(show_spinner=False)
 def preprocess_data(df):
     """데이터 전처리: 단위 변환 및 파생 변수 생성"""
     if df.empty:
         return df
     
     # 1. 금액 단위 변환 (JSON 1,000 -> KRW 1)
-    amount_cols = ['deposit', 'monthlyRent', 'premium', 'maintenanceFee']
-    for col in amount_cols:
-        if col in df.columns:
-            df[col] = df[col] * 1000
-    
-    # 2. 관심도 점수 계산
-    df['interestScore'] = df.apply(calculate_interest_score, axis=1)
+    amount_cols = [col for col in ['deposit', 'monthlyRent', 'premium', 'maintenanceFee'] if col in df.columns]
+    # downcast된 정수 컬럼의 오버플로를 막기 위해 float64로 변환 후 계산
+    amounts = df[amount_cols].astype('float64').mul(AMOUNT_UNIT)
+    derived = {col: amounts[col] for col in amount_cols}
     
-    # 3. 평당 월세 계산 (size 대비 월세)
-    # size가 0인 경우를 방지하기 위해 0.01로 대체하거나 NaN 처리 가능
-    df['rent_per_area'] = df.apply(lambda r: (r['monthlyRent'] / r['size']) if r['size'] > 0 else 0, axis=1)
+    # 2. 관심도 점수 계산: viewCount + (favoriteCount * 3)
+    # 3. 평당 월세 계산 (size 대비 월세, size가 0 이하인 경우 0)
+    # 조회수/찜 컬럼이 없는 CSV는 0으로 간주
+    zeros = pd.Series(0, index=df.index)
+    derived['interestScore'], derived['rent_per_area'] = compute_derived(
+        df.get('viewCount', zeros).fillna(0).to_numpy(dtype=np.int64),
+        df.get('favoriteCount', zeros).fillna(0).to_numpy(dtype=np.int64),
+        amounts['monthlyRent'].to_numpy(dtype=np.float64),
+        df['size'].to_numpy(dtype=np.float64),
+    )
     
     # 4. 날짜 변환
     if 'createdDateUtc' in df.columns:
-        df['createdDateUtc'] = pd.to_datetime(df['createdDateUtc'])
+        derived['createdDateUtc'] = pd.to_datetime(df['createdDateUtc'])
     
-    return df
+    # 5. 검색용 소문자 컬럼 (rerun마다 대소문자 변환을 반복하지 않도록 미리 계산)
+    derived['_title_lc'] = df['title'].str.lower()
+    derived['_subway_lc'] = df['nearSubwayStation'].str.lower()
+    
+    # 한 번의 assign으로 컬럼을 추가해 DataFrame 단편화를 방지
+    return df.assign(**derived)
+
+@st.cache_data(show_spinner=False)
+def get_code_options(codes):
+    """필터 선택지 생성: '전체' + 정렬된 고유 코드명"""
+    return ["전체"] + sorted(codes.dropna().unique().tolist())
+
+@st.cache_data(show_spinner=False)
+def compute_histogram(values, bins=HISTOGRAM_BINS):
+    """히스토그램 사전 집계: (구간 중심, 구간 폭, 빈도) 반환"""
+    counts, edges = np.histogram(values.dropna().to_numpy(), bins=bins)
+    return (edges[:-1] + edges[1:]) / 2, np.diff(edges), counts
+
+def create_histogram(values, title, label, color):
+    """사전 집계한 빈도로 go.Bar 히스토그램 생성 (원본 값 전체를 Plotly로 보내지 않음)"""
+    centers, widths, counts = compute_histogram(values)
+    fig = go.Figure(go.Bar(x=centers, y=counts, width=widths, marker_color=color))
+    fig.update_layout(title=title, xaxis_title=label, yaxis_title="count", bargap=0)
+    return fig
+
+def create_size_rent_scatter(df):
+    """면적 대비 월세 산점도: WebGL(scattergl)로 렌더링, 대용량은 래스터 이미지로 대체"""
+    title = "면적 대비 월세 상관관계"
+    labels = {"size": "면적(㎡)", "monthlyRent": "월세"}
+    if len(df) <= SCATTER_RASTER_THRESHOLD:
+        return px.scatter(df[['size', 'monthlyRent', 'businessLargeCodeName', 'title']], x="size", y="monthlyRent", color="businessLargeCodeName",
+                          title=title, labels=labels, hover_data=["title"], render_mode="webgl")
+    
+    points = df[['size', 'monthlyRent']].dropna()
+    if ds is None:
+        # datashader 미설치 시 밀도 히트맵으로 대체
+        return px.density_heatmap(points, x="size", y="monthlyRent", nbinsx=100, nbinsy=100,
+                                  title=title, labels=labels)
+    
+    width, height = SCATTER_RASTER_SIZE
+    x_range = (float(points['size'].min()), float(points['size'].max()))
+    y_range = (float(points['monthlyRent'].min()), float(points['monthlyRent'].max()))
+    canvas = ds.Canvas(plot_width=width, plot_height=height, x_range=x_range, y_range=y_range)
+    # origin='upper'로 뒤집지 않으면 첫 행이 y 최솟값에 대응
+    image = tf.shade(canvas.points(points, 'size', 'monthlyRent'), how='log').to_pil(origin='upper')
+    fig = go.Figure(go.Image(source=image, x0=x_range[0], dx=(x_range[1] - x_range[0]) / width,
+                             y0=y_range[0], dy=(y_range[1] - y_range[0]) / height))
+    fig.update_layout(title=title, xaxis_title=labels["size"], yaxis_title=labels["monthlyRent"],
+                      yaxis={'autorange': True})
+    return fig
+
+@st.cache_data(show_spinner=False)
+def compute_overview_stats(df):
+    """개요 섹션 KPI/집계 사전 계산 (데이터가 바뀔 때만 재계산)"""
+    type_counts = df['businessLargeCodeName'].value_counts()
+    return {
+        'count': len(df),
+        'median_deposit': df['deposit'].median(),
+        'median_rent': df['monthlyRent'].median(),
+        'mean_size': df['size'].mean(),
+        'mean_premium': df['premium'].mean(),
+        'type_counts': type_counts[type_counts > 0],
+        'top_type': df['businessLargeCodeName'].mode()[0],
+    }
+
+@st.cache_data(show_spinner=False)
+def compute_industry_stats(df):
+    """업종 분석 섹션 KPI/집계 사전 계산 (필터 조건이 바뀔 때만 재계산)"""
+    rent_by_floor = df.groupby('floor')['monthlyRent'].mean()
+    return {
+        'mean_rent': df['monthlyRent'].mean(),
+        'mean_deposit': df['deposit'].mean(),
+        'mean_rent_per_area': df['rent_per_area'].mean(),
+        'mean_interest': df['interestScore'].mean(),
+        'rent_by_middle': df.groupby('businessMiddleCodeName', observed=True)['monthlyRent'].mean().sort_values(ascending=False),
+        'high_rent_floor': rent_by_floor.idxmax() if rent_by_floor.notna().any() else None,
+    }
 
 # --- SECTION 1: OVERVIEW ---
-def create_overview_section(df):
+def create_overview_section(df, stats=None):
     st.header("📊 SECTION 1: 전체 EDA 개요")
+    # DB 소스는 SQL 집계 결과(stats)를 사용하고, CSV는 DataFrame에서 계산
+    if stats is None:
+        stats = compute_overview_stats(df)
     
     # KPI 카드
     m1, m2, m3, m4, m5 = st.columns(5)
-    m1.metric("전체 매물 수", f"{len(df):,}개")
-    m2.metric("중앙 보증금", format_krw(df['deposit'].median()))
-    m3.metric("중앙 월세", format_krw(df['monthlyRent'].median()))
-    m4.metric("평균 면적", f"{df['size'].mean():.2f}㎡")
-    m5.metric("평균 권리금", format_krw(df['premium'].mean()))
+    m1.metric("전체 매물 수", f"{stats['count']:,}개")
+    m2.metric("중앙 보증금", format_krw(stats['median_deposit']))
+    m3.metric("중앙 월세", format_krw(stats['median_rent']))
+    m4.metric("평균 면적", f"{stats['mean_size']:.2f}㎡")
+    m5.metric("평균 권리금", format_krw(stats['mean_premium']))
     
     st.markdown("---")
     
     c1, c2 = st.columns(2)
     with c1:
         # 월세 분포
-        fig_rent = px.histogram(df, x="monthlyRent", title="월세 분포 (KRW)", 
-                                labels={"monthlyRent": "월세"}, color_discrete_sequence=['#1f77b4'])
+        fig_rent = create_histogram(df['monthlyRent'], "월세 분포 (KRW)", "월세", '#1f77b4')
         st.plotly_chart(fig_rent, use_container_width=True)
         
         # 보증금 분포
-        fig_dep = px.histogram(df, x="deposit", title="보증금 분포 (KRW)", 
-                               labels={"deposit": "보증금"}, color_discrete_sequence=['#aec7e8'])
+        fig_dep = create_histogram(df['deposit'], "보증금 분포 (KRW)", "보증금", '#aec7e8')
         st.plotly_chart(fig_dep, use_container_width=True)
 
     with c2:
         # 월세 vs 면적 산점도
-        fig_scatter = px.scatter(df, x="size", y="monthlyRent", color="businessLargeCodeName",
-                                 title="면적 대비 월세 상관관계", 
-                                 labels={"size": "면적(㎡)", "monthlyRent": "월세"},
-                                 hover_data=["title"])
+        fig_scatter = create_size_rent_scatter(df)
         st.plotly_chart(fig_scatter, use_container_width=True)
         
         # 업종 대분류별 매물 수
-        type_counts = df['businessLargeCodeName'].value_counts().reset_index()
+        type_counts = stats['type_counts'].reset_index()
         type_counts.columns = ['업종', '매물수']
         fig_bar = px.bar(type_counts, x='업종', y='매물수', title="업종 대분류별 매물 수",
                          color_discrete_sequence=['#1f77b4'])
@@ -116,7 +336,7 @@ def create_overview_section(df):
     # 자동 인사이트 (Overview)
     st.info(f"""
     **[Overview Insight]** 
-    - 현재 시장의 중앙 월세는 **{format_krw(df['monthlyRent'].median())}**이며, 가장 매물이 많은 업종은 **{df['businessLargeCodeName'].mode()[0]}**입니다.
+    - 현재 시장의 중앙 월세는 **{format_krw(stats['median_rent'])}**이며, 가장 매물이 많은 업종은 **{stats['top_type']}**입니다.
     - 면적과 월세 사이에는 정(+)의 상관관계가 관찰됩니다.
     """)
 
@@ -126,97 +346,118 @@ def create_industry_analysis(df):
     
     # 사이드바 필터는 호출부(main)에서 처리됨
     # 여기서는 필터링된 데이터(df)를 대상으로 시각화
+    if df.empty:
+        st.warning(EMPTY_FILTER_MESSAGE)
+        return
+    
+    stats = compute_industry_stats(df)
     
     m1, m2, m3, m4 = st.columns(4)
-    if not df.empty:
-        m1.metric("선택 업종 평균 월세", format_krw(df['monthlyRent'].mean()))
-        m2.metric("선택 업종 평균 보증금", format_krw(df['deposit'].mean()))
-        m3.metric("평균 평당 월세", format_krw(df['rent_per_area'].mean()))
-        m4.metric("평균 관심도 점수", f"{df['interestScore'].mean():.2f}")
+    m1.metric("선택 업종 평균 월세", format_krw(stats['mean_rent']))
+    m2.metric("선택 업종 평균 보증금", format_krw(stats['mean_deposit']))
+    m3.metric("평균 평당 월세", format_krw(stats['mean_rent_per_area']))
+    m4.metric("평균 관심도 점수", f"{stats['mean_interest']:.2f}")
     
     st.markdown("---")
     
     c1, c2 = st.columns(2)
     with c1:
         # 층별 월세 Box Plot
-        fig_box = px.box(df, x="floor", y="monthlyRent", title="층별 월세 분포",
+        fig_box = px.box(df[['floor', 'monthlyRent']], x="floor", y="monthlyRent", title="층별 월세 분포",
                          labels={"floor": "층수", "monthlyRent": "월세"})
         st.plotly_chart(fig_box, use_container_width=True)
         
         # 업종별 평균 월세 비교 (데이터가 충분할 때)
-        avg_rent_by_sub = df.groupby('businessMiddleCodeName')['monthlyRent'].mean().sort_values(ascending=False).reset_index()
+        avg_rent_by_sub = stats['rent_by_middle'].reset_index()
         fig_ind_bar = px.bar(avg_rent_by_sub, x='monthlyRent', y='businessMiddleCodeName', orientation='h',
                              title="중분류별 평균 월세 규모", labels={"monthlyRent": "평균 월세", "businessMiddleCodeName": "중분류"})
         st.plotly_chart(fig_ind_bar, use_container_width=True)
 
     with c2:
         # 평당 월세 Top 10
-        top_rent_per_area = df.nlargest(10, 'rent_per_area')
+        top_rent_per_area = df[['title', 'rent_per_area']].nlargest(10, 'rent_per_area')
         fig_top_rent = px.bar(top_rent_per_area, x='rent_per_area', y='title', orientation='h',
                               title="평당 월세 Top 10 매물", labels={"rent_per_area": "평당 월세", "title": "매물명"})
         fig_top_rent.update_layout(yaxis={'categoryorder':'total ascending'})
         st.plotly_chart(fig_top_rent, use_container_width=True)
         
         # 관심도 상위 매물
-        top_interest = df.nlargest(10, 'interestScore')
+        top_interest = df[['title', 'interestScore']].nlargest(10, 'interestScore')
         fig_top_interest = px.bar(top_interest, x='interestScore', y='title', orientation='h',
                                   title="관심도(조회+찜) 상위 매물", labels={"interestScore": "관심도 점수", "title": "매물명"})
         fig_top_interest.update_layout(yaxis={'categoryorder':'total ascending'})
         st.plotly_chart(fig_top_interest, use_container_width=True)
 
     # 자동 인사이트 (Industry)
-    if not df.empty:
-        high_rent_floor = df.groupby('floor')['monthlyRent'].mean().idxmax()
-        st.info(f"""
-        **[Market Insight]** 
-        - 분석 결과, **{high_rent_floor}층** 매물의 평균 월세가 가장 높게 형성되어 있습니다.
-        - **{df.nlargest(1, 'rent_per_area')['title'].values[0]}** 매물이 평당 효율 측면에서 가장 높은 가치를 보이고 있습니다.
-        """)
+    high_rent_floor = stats['high_rent_floor']
+    st.info(f"""
+    **[Market Insight]** 
+    - 분석 결과, **{high_rent_floor}층** 매물의 평균 월세가 가장 높게 형성되어 있습니다.
+    - **{top_rent_per_area['title'].iloc[0]}** 매물이 평당 효율 측면에서 가장 높은 가치를 보이고 있습니다.
+    """)
 
 # --- SECTION 3: SEARCH & DETAILS ---
+@st.fragment
 def create_search_section(df):
+    """검색 섹션: fragment로 실행되어 검색 위젯 조작 시 이 섹션만 다시 실행"""
     st.header("🔍 SECTION 3: 매물 검색 & 상세 조회")
+    if df.empty:
+        st.warning(EMPTY_FILTER_MESSAGE)
+        return
     
     c1, c2, c3 = st.columns(3)
-    search_keyword = c1.text_input("제목 키워드 검색")
-    subway_keyword = c2.text_input("지하철역 키워드 검색")
-    min_interest = c3.slider("최소 관심도 점수", 0, int(df['interestScore'].max() if not df.empty else 100), 0)
+    search_keyword = save_widget_state('search_keyword', c1.text_input(
+        "제목 키워드 검색", key=restore_widget_state('search_keyword', "")))
+    subway_keyword = save_widget_state('subway_keyword', c2.text_input(
+        "지하철역 키워드 검색", key=restore_widget_state('subway_keyword', "")))
+    max_interest = int(df['interestScore'].max())
+    min_interest = save_widget_state('min_interest', c3.slider(
+        "최소 관심도 점수", 0, max_interest,
+        key=restore_widget_state('min_interest', 0, clamp=lambda v: min(max(v, 0), max_interest))))
     
     # 검색 필터 적용
-    search_df = df.copy()
+    mask = df['interestScore'] >= min_interest
     if search_keyword:
-        search_df = search_df[search_df['title'].str.contains(search_keyword, case=False, na=False)]
+        mask &= df['_title_lc'].str.contains(search_keyword.lower(), regex=False, na=False)
     if subway_keyword:
-        search_df = search_df[search_df['nearSubwayStation'].str.contains(subway_keyword, case=False, na=False)]
-    search_df = search_df[search_df['interestScore'] >= min_interest]
+        mask &= df['_subway_lc'].str.contains(subway_keyword.lower(), regex=False, na=False)
+    search_df = df.loc[mask]
     
     # 테이블 표시용 가공
     display_cols = ['title', 'businessMiddleCodeName', 'monthlyRent', 'deposit', 'premium', 'size', 'interestScore']
-    display_df = search_df[display_cols].copy()
-    for col in ['monthlyRent', 'deposit', 'premium']:
-        display_df[col] = display_df[col].apply(lambda x: f"{int(x):,}")
-    
-    st.dataframe(display_df.rename(columns={
-        'title': '매물명', 'businessMiddleCodeName': '업종', 'monthlyRent': '월세(원)', 
-        'deposit': '보증금(원)', 'premium': '권리금(원)', 'size': '면적(㎡)', 'interestScore': '관심도'
-    }), use_container_width=True)
+    # 금액은 숫자 그대로 전달하고 포맷팅은 프론트엔드(column_config)에서 처리
+    st.dataframe(search_df[display_cols], use_container_width=True, column_config={
+        'title': st.column_config.TextColumn("매물명"),
+        'businessMiddleCodeName': st.column_config.TextColumn("업종"),
+        'monthlyRent': st.column_config.NumberColumn("월세(원)", format="localized"),
+        'deposit': st.column_config.NumberColumn("보증금(원)", format="localized"),
+        'premium': st.column_config.NumberColumn("권리금(원)", format="localized"),
+        'size': st.column_config.NumberColumn("면적(㎡)"),
+        'interestScore': st.column_config.NumberColumn("관심도"),
+    })
     
     st.subheader("📋 개별 매물 상세 정보")
-    for _, row in search_df.iterrows():
-        with st.expander(f"📌 {row['title']} ({row['businessMiddleCodeName']})"):
+    # 상세 정보 expander는 페이지 단위로만 생성 (위젯 수를 페이지 크기로 제한)
+    total_pages = max(1, -(-len(search_df) // DETAIL_PAGE_SIZE))
+    page = save_widget_state('detail_page', st.number_input(
+        f"페이지 (총 {total_pages}페이지)", min_value=1, max_value=total_pages, step=1,
+        key=restore_widget_state('detail_page', 1, clamp=lambda v: min(max(v, 1), total_pages))))
+    start = (page - 1) * DETAIL_PAGE_SIZE
+    for row in search_df.iloc[start:start + DETAIL_PAGE_SIZE].itertuples(index=False):
+        with st.expander(f"📌 {row.title} ({row.businessMiddleCodeName})"):
             sc1, sc2, sc3 = st.columns(3)
-            sc1.write(f"**보증금:** {format_krw(row['deposit'])}")
-            sc1.write(f"**월세:** {format_krw(row['monthlyRent'])}")
-            sc1.write(f"**권리금:** {format_krw(row['premium'])}")
+            sc1.write(f"**보증금:** {format_krw(row.deposit)}")
+            sc1.write(f"**월세:** {format_krw(row.monthlyRent)}")
+            sc1.write(f"**권리금:** {format_krw(row.premium)}")
             
-            sc2.write(f"**면적:** {row['size']}㎡")
-            sc2.write(f"**층수:** {row['floor']} / {row['groundFloor']}")
-            sc2.write(f"**평당 월세:** {format_krw(row['rent_per_area'])}")
+            sc2.write(f"**면적:** {row.size}㎡")
+            sc2.write(f"**층수:** {row.floor} / {row.groundFloor}")
+            sc2.write(f"**평당 월세:** {format_krw(row.rent_per_area)}")
             
-            sc3.write(f"**관리비:** {format_krw(row['maintenanceFee'])}")
-            sc3.write(f"**관심도:** {row['interestScore']} 점")
-            sc3.write(f"**생성일:** {row['createdDateUtc'].strftime('%Y-%m-%d') if pd.notna(row['createdDateUtc']) else 'N/A'}")
-            st.write(f"**주변역:** {row['nearSubwayStation']}")
+            sc3.write(f"**관리비:** {format_krw(row.maintenanceFee)}")
+            sc3.write(f"**관심도:** {row.interestScore} 점")
+            sc3.write(f"**생성일:** {row.createdDateUtc.strftime('%Y-%m-%d') if pd.notna(row.createdDateUtc) else 'N/A'}")
+            st.write(f"**주변역:** {row.nearSubwayStation}")
 
 # --- MAIN ---
 def main():
@@ -231,8 +472,12 @@ def main():
     data_source = st.sidebar.radio("데이터 소스 선택", ["SQLite DB", "CSV 파일 업로드"])
     
     raw_df = pd.DataFrame()
+    overview_stats = None
     if data_source == "SQLite DB":
         raw_df = load_data(source_type="DB")
+        db_path = resolve_db_path()
+        if not raw_df.empty:
+            overview_stats = sql_overview_stats(db_path, os.path.getmtime(db_path))
     else:
         uploaded_file = st.sidebar.file_uploader("CSV 파일 업로드", type="csv")
         if uploaded_file:
@@ -250,39 +495,41 @@ def main():
     st.sidebar.header("🎯 필터링")
     
     # 업종 필터
-    large_codes = ["전체"] + sorted(df['businessLargeCodeName'].unique().tolist())
+    large_codes = get_code_options(df['businessLargeCodeName'])
     selected_large = st.sidebar.selectbox("업종 대분류", large_codes)
     
-    filtered_df = df.copy()
+    # 모든 조건을 하나의 boolean mask로 합성한 뒤 한 번만 슬라이싱
+    mask = pd.Series(True, index=df.index)
     if selected_large != "전체":
-        filtered_df = filtered_df[filtered_df['businessLargeCodeName'] == selected_large]
+        mask &= df['businessLargeCodeName'] == selected_large
         
-    middle_codes = ["전체"] + sorted(filtered_df['businessMiddleCodeName'].unique().tolist())
+    middle_codes = get_code_options(df.loc[mask, 'businessMiddleCodeName'])
     selected_middle = st.sidebar.selectbox("업종 중분류", middle_codes)
     if selected_middle != "전체":
-        filtered_df = filtered_df[filtered_df['businessMiddleCodeName'] == selected_middle]
+        mask &= df['businessMiddleCodeName'] == selected_middle
 
     # 금액/면적 필터
     dep_range = st.sidebar.slider("보증금 범위 (만원)", 0, int(df['deposit'].max()/10000), (0, int(df['deposit'].max()/10000)))
     rent_range = st.sidebar.slider("월세 범위 (만원)", 0, int(df['monthlyRent'].max()/10000), (0, int(df['monthlyRent'].max()/10000)))
     size_range = st.sidebar.slider("면적 범위 (㎡)", 0, int(df['size'].max()), (0, int(df['size'].max())))
     
-    filtered_df = filtered_df[
-        (filtered_df['deposit'] >= dep_range[0] * 10000) & (filtered_df['deposit'] <= dep_range[1] * 10000) &
-        (filtered_df['monthlyRent'] >= rent_range[0] * 10000) & (filtered_df['monthlyRent'] <= rent_range[1] * 10000) &
-        (filtered_df['size'] >= size_range[0]) & (filtered_df['size'] <= size_range[1])
-    ]
+    mask &= (
+        df['deposit'].between(dep_range[0] * 10000, dep_range[1] * 10000) &
+        df['monthlyRent'].between(rent_range[0] * 10000, rent_range[1] * 10000) &
+        df['size'].between(*size_range)
+    )
+    filtered_df = df.loc[mask]
 
     # TABS
-    tab1, tab2, tab3 = st.tabs(["전체 EDA", "업종 분석", "매물 탐색"])
-    
-    with tab1:
-        create_overview_section(df) # 전체 데이터 기준 개요
+    # st.tabs는 숨겨진 탭 본문까지 모두 실행하므로, 선택된 섹션만 렌더링하도록 radio로 탭을 구성
+    st.radio("섹션 선택", ["전체 EDA", "업종 분석", "매물 탐색"], horizontal=True,
+             key="active_tab", label_visibility="collapsed")
     
-    with tab2:
+    if st.session_state.active_tab == "전체 EDA":
+        create_overview_section(df, overview_stats) # 전체 데이터 기준 개요
+    elif st.session_state.active_tab == "업종 분석":
         create_industry_analysis(filtered_df) # 필터링된 데이터 기준 분석
-        
-    with tab3:
+    else:
         create_search_section(filtered_df) # 필터링된 데이터 기준 검색
 
 if __name__ == "__main__":